@@ -4,12 +4,16 @@ import os
 import pytz
 import swisseph as swe
 
+from astro.strength import compute_strengths
+
 # ---------------- Config ----------------
 EPHE_PATH = os.getenv("SWE_EPHE_PATH")
 if EPHE_PATH:
     swe.set_ephe_path(EPHE_PATH)
 
 DAYS_PER_YEAR = 365.2425
+UNIX_EPOCH_JD = 2440587.5
+AYANAMSA_RATE_STEP = 0.01  # days, central difference for the ayanamsa rate
 
 PLANETS = {
     "Sun": swe.SUN, "Moon": swe.MOON, "Mercury": swe.MERCURY, "Venus": swe.VENUS,
@@ -26,6 +30,9 @@ DASHA_ORDER = ["Ketu","Venus","Sun","Moon","Mars","Rahu","Jupiter","Saturn","Mer
 DASHA_YEARS = {"Ketu":7,"Venus":20,"Sun":6,"Moon":10,"Mars":7,"Rahu":18,"Jupiter":16,"Saturn":19,"Mercury":17}
 NAKSHATRA_LORDS = DASHA_ORDER * 3  # 27
 
+AYANAMSAS = {"LAHIRI": swe.SIDM_LAHIRI, "RAMAN": swe.SIDM_RAMAN, "KP": swe.SIDM_KRISHNAMURTI}
+HOUSE_SYSTEMS = {"WS": "WS", "WHOLE": "WS", "P": "P", "PLACIDUS": "P", "E": "E", "EQUAL": "E"}
+
 
 # ---------------- Helpers ----------------
 def normalize_angle(a):
@@ -50,15 +57,6 @@ def normalize_cusps_array_raw(cusps_raw):
 def build_house_cusps_dict(cusps12):
     return {str(i+1): round(float(cusps12[i]), 6) for i in range(12)}
 
-def safe_calc_speed(jd_ut, pcode):
-    try:
-        xx_spd, _ = swe.calc_ut(jd_ut, pcode, swe.FLG_SPEED | swe.FLG_SIDEREAL)
-        if xx_spd and len(xx_spd) >= 4:
-            return float(xx_spd[3])
-    except Exception:
-        pass
-    return None
-
 def jd_to_iso(jd):
     y,m,d,hour = swe.revjul(jd)
     h = int(hour)
@@ -81,6 +79,15 @@ def jd_to_iso(jd):
     except Exception:
         return f"{int(y):04d}-{int(m):02d}-{int(d):02d}"
 
+def jd_to_datetime(jd):
+    """Julian day (UT) to an aware UTC datetime, without an ephemeris call."""
+    return datetime.fromtimestamp((jd - UNIX_EPOCH_JD) * 86400.0, tz=pytz.UTC)
+
+def datetime_to_jd(dt):
+    if dt.tzinfo is None:
+        dt = pytz.UTC.localize(dt)
+    return dt.timestamp() / 86400.0 + UNIX_EPOCH_JD
+
 def get_house_for_longitude(planet_lon, cusps):
     """
     Assign planet to house given its longitude and 12-element cusp list.
@@ -102,11 +109,16 @@ def get_house_for_longitude(planet_lon, cusps):
 
 
 # ---------------- Vimshottari Dasha ----------------
-def calc_vimshottari_dasha(jd_ut):
+def moon_sidereal_longitude(jd_ut):
     swe.set_sid_mode(swe.SIDM_LAHIRI)
     xx, _ = swe.calc_ut(jd_ut, swe.MOON, swe.FLG_SIDEREAL)
-    moon_lon_sid = normalize_angle(xx[0])
+    return normalize_angle(xx[0])
 
+def iter_mahadashas(jd_ut, moon_lon_sid, max_periods=1000):
+    """
+    Yield mahadasha periods {"planet", "start_jd", "end_jd"} from birth onwards.
+    Pure arithmetic on the birth Moon longitude; no ephemeris calls.
+    """
     nak_size = 360.0/27.0
     nak_index = int(moon_lon_sid // nak_size)
     first_lord = NAKSHATRA_LORDS[nak_index]
@@ -115,43 +127,62 @@ def calc_vimshottari_dasha(jd_ut):
     frac_left = 1.0 - frac_into
     balance_years = frac_left * DASHA_YEARS[first_lord]
 
-    now_utc = datetime.now(tz=pytz.UTC)
-    today_jd = swe.julday(now_utc.year, now_utc.month, now_utc.day,
-                         now_utc.hour + now_utc.minute/60.0 + now_utc.second/3600.0 + now_utc.microsecond/3600.0/1e6)
-
-    dasha_list = []
     idx = DASHA_ORDER.index(first_lord)
     start_jd = jd_ut
-    i = 0
-    while True:
+    for i in range(max_periods + 1):
         p = DASHA_ORDER[(idx + i) % 9]
         years = balance_years if i == 0 else DASHA_YEARS[p]
         end_jd = start_jd + years * DAYS_PER_YEAR
-        dasha_list.append({"planet": p, "start_jd": start_jd, "end_jd": end_jd})
-        if end_jd >= today_jd:
-            break
+        yield {"planet": p, "start_jd": start_jd, "end_jd": end_jd}
         start_jd = end_jd
-        i += 1
-        if i > 1000:
-            break
 
-    current_maha = next((d for d in dasha_list if d["start_jd"] <= today_jd < d["end_jd"]), None)
+def iter_antardashas(maha):
+    """Yield the 9 antardasha periods of a mahadasha, scaled to its effective length."""
+    maha_start = maha["start_jd"]
+    maha_years_effective = (maha["end_jd"] - maha_start) / DAYS_PER_YEAR
+    idx2 = DASHA_ORDER.index(maha["planet"])
+    start_sub = maha_start
+    for j in range(9):
+        p = DASHA_ORDER[(idx2 + j) % 9]
+        anta_years = maha_years_effective * (DASHA_YEARS[p] / 120.0)
+        end_sub = start_sub + anta_years * DAYS_PER_YEAR
+        yield {"planet": p, "start_jd": start_sub, "end_jd": end_sub}
+        start_sub = end_sub
+
+def next_dasha_transition(jd_ut, moon_lon_sid, after_jd):
+    """
+    First antardasha boundary strictly after `after_jd`.
+    Returns {"jd", "mahadasha", "antardasha", "mahadasha_change"} for the period starting there,
+    or None if it lies beyond the computed dasha range.
+    """
+    for maha in iter_mahadashas(jd_ut, moon_lon_sid):
+        if maha["end_jd"] <= after_jd:
+            continue
+        for j, anta in enumerate(iter_antardashas(maha)):
+            if anta["start_jd"] > after_jd:
+                return {"jd": anta["start_jd"], "mahadasha": maha["planet"],
+                        "antardasha": anta["planet"], "mahadasha_change": j == 0}
+    return None
+
+def calc_vimshottari_dasha(jd_ut, moon_lon_sid=None):
+    if moon_lon_sid is None:
+        moon_lon_sid = moon_sidereal_longitude(jd_ut)
+
+    now_utc = datetime.now(tz=pytz.UTC)
+    today_jd = swe.julday(now_utc.year, now_utc.month, now_utc.day,
+                         now_utc.hour + now_utc.minute/60.0 + now_utc.second/3600.0 + now_utc.microsecond/3600.0/1e6)
+
+    current_maha = None
+    for maha in iter_mahadashas(jd_ut, moon_lon_sid):
+        if maha["end_jd"] >= today_jd:
+            if maha["start_jd"] <= today_jd < maha["end_jd"]:
+                current_maha = maha
+            break
 
     current_anta = None
     if current_maha:
-        maha_start = current_maha["start_jd"]
-        maha_end = current_maha["end_jd"]
-        maha_years_effective = (maha_end - maha_start) / DAYS_PER_YEAR
-        idx2 = DASHA_ORDER.index(current_maha["planet"])
-        start_sub = maha_start
-        for j in range(9):
-            p = DASHA_ORDER[(idx2 + j) % 9]
-            anta_years = maha_years_effective * (DASHA_YEARS[p] / 120.0)
-            end_sub = start_sub + anta_years * DAYS_PER_YEAR
-            if start_sub <= today_jd < end_sub:
-                current_anta = {"planet": p, "start_jd": start_sub, "end_jd": end_sub}
-                break
-            start_sub = end_sub
+        current_anta = next((a for a in iter_antardashas(current_maha)
+                             if a["start_jd"] <= today_jd < a["end_jd"]), None)
 
     def ser(d):
         if not d: return None
@@ -160,7 +191,8 @@ def calc_vimshottari_dasha(jd_ut):
 
 
 # --------------- Main generator ---------------
-def generate_chart(birth, house_system='WS'):
+def birth_to_jd_ut(birth):
+    """Validate birth details and return (local_dt, utc_dt, jd_ut)."""
     required = ["year","month","date","hours","minutes","seconds","timezone","latitude","longitude"]
     for k in required:
         if k not in birth:
@@ -172,8 +204,11 @@ def generate_chart(birth, house_system='WS'):
     local_dt = tz.localize(local_dt)
     utc_dt = local_dt.astimezone(pytz.utc)
     frac_hour = utc_dt.hour + utc_dt.minute/60.0 + utc_dt.second/3600.0 + utc_dt.microsecond/3600.0/1e6
-    jd_ut_local = swe.julday(utc_dt.year, utc_dt.month, utc_dt.day, frac_hour)
+    jd_ut = swe.julday(utc_dt.year, utc_dt.month, utc_dt.day, frac_hour)
+    return local_dt, utc_dt, jd_ut
 
+def _chart_input(birth):
+    local_dt, utc_dt, jd_ut = birth_to_jd_ut(birth)
     lon = float(birth["longitude"])
     lat = float(birth["latitude"])
     alt = float(birth.get("altitude_m", 0.0))
@@ -181,70 +216,157 @@ def generate_chart(birth, house_system='WS'):
         swe.set_topo(lon, lat, alt)
     except Exception:
         pass
+    return {
+        "local_datetime": local_dt.isoformat(),
+        "utc_datetime": utc_dt.isoformat(),
+        "timezone": birth["timezone"],
+        "latitude": lat, "longitude": lon, "altitude_m": alt,
+        "julian_day_ut": jd_ut
+    }
 
-    swe.set_sid_mode(swe.SIDM_LAHIRI)
-
-    cusps_raw, ascmc = swe.houses(jd_ut_local, lat, lon, b'P')
-    ayan = swe.get_ayanamsa(jd_ut_local)
-
-    asc_trop = normalize_angle(ascmc[0])
-    asc_sid = normalize_angle(asc_trop - ayan)
-    asc_sign_index, asc_sign_name, asc_deg_in_sign = zodiac_sign_from_longitude(asc_sid)
-
-    cusps12_trop = normalize_cusps_array_raw(cusps_raw)
-    cusps12_sid = [normalize_angle(c - ayan) for c in cusps12_trop]
+def compute_tropical_positions(jd_ut):
+    """The only per-planet ephemeris pass: tropical longitude/latitude/distance/speed."""
+    positions = {}
+    for pname, pcode in PLANETS.items():
+        try:
+            xx, _ = swe.calc_ut(jd_ut, pcode, swe.FLG_SPEED)
+            positions[pname] = {
+                "lon": normalize_angle(xx[0]),
+                "lat": float(xx[1]) if len(xx) > 1 else 0.0,
+                "dist": float(xx[2]) if len(xx) > 2 else None,
+                "speed": float(xx[3]) if len(xx) > 3 else None,
+            }
+        except Exception as e:
+            positions[pname] = {"error": str(e)}
+    return positions
 
-    if str(house_system).upper() in ('WS','WHOLE'):
+def ayanamsa_offset(jd_ut, ayanamsa):
+    """
+    True ayanamsa (with nutation) and its rate in deg/day, so tropical - offset
+    matches FLG_SIDEREAL longitudes and tropical speed - rate its sidereal speeds.
+    """
+    swe.set_sid_mode(AYANAMSAS[ayanamsa])
+    _, ayan = swe.get_ayanamsa_ex_ut(jd_ut, 0)
+    _, before = swe.get_ayanamsa_ex_ut(jd_ut - AYANAMSA_RATE_STEP, 0)
+    _, after = swe.get_ayanamsa_ex_ut(jd_ut + AYANAMSA_RATE_STEP, 0)
+    return ayan, (after - before) / (2 * AYANAMSA_RATE_STEP)
+
+def normalize_house_system(house_system):
+    key = str(house_system).upper()
+    if key not in HOUSE_SYSTEMS:
+        raise ValueError(f"Unsupported house system {house_system!r}; use one of {sorted(HOUSE_SYSTEMS)}")
+    return HOUSE_SYSTEMS[key]
+
+def normalize_ayanamsa(ayanamsa):
+    key = str(ayanamsa).upper()
+    if key not in AYANAMSAS:
+        raise ValueError(f"Unsupported ayanamsa {ayanamsa!r}; use one of {sorted(AYANAMSAS)}")
+    return key
+
+def sidereal_cusps(house_system, asc_sid, placidus_trop, ayan):
+    if house_system == "WS":
         asc_sign_start = int(asc_sid // 30) * 30.0
-        cusps_used = [normalize_angle(asc_sign_start + i * 30.0) for i in range(12)]
-    else:
-        cusps_used = cusps12_sid
+        return [normalize_angle(asc_sign_start + i * 30.0) for i in range(12)]
+    if house_system == "E":
+        return [normalize_angle(asc_sid + i * 30.0) for i in range(12)]
+    return [normalize_angle(c - ayan) for c in placidus_trop]
 
+def build_planets_out(tropical, ayan, ayan_rate, cusps_used):
     planets_out = []
-    for pname,pcode in PLANETS.items():
-        try:
-            xx,_ = swe.calc_ut(jd_ut_local, pcode, swe.FLG_SIDEREAL)
-            lon_deg = normalize_angle(xx[0])
-            lat_deg = float(xx[1]) if len(xx) > 1 else 0.0
-            dist = float(xx[2]) if len(xx) > 2 else None
-            speed = safe_calc_speed(jd_ut_local, pcode)
-            retro = (speed is not None and speed < 0)
-            sign_idx, sign_name, deg_in_sign = zodiac_sign_from_longitude(lon_deg)
-            house_no = get_house_for_longitude(lon_deg, cusps_used)
-            planets_out.append({
-                "name": pname,
-                "longitude_deg": round(lon_deg, 6),
-                "latitude_deg": round(lat_deg, 6),
-                "distance_au": round(dist, 6) if dist is not None else None,
-                "sign": sign_name,
-                "sign_index": sign_idx + 1,
-                "degree_in_sign": round(deg_in_sign, 6),
-                "house": house_no,
-                "retrograde": bool(retro)
-            })
-        except Exception as e:
-            planets_out.append({"name": pname, "error": str(e)})
+    for pname, pos in tropical.items():
+        if "error" in pos:
+            planets_out.append({"name": pname, "error": pos["error"]})
+            continue
+        lon_deg = normalize_angle(pos["lon"] - ayan)
+        dist = pos["dist"]
+        speed = pos["speed"] - ayan_rate if pos["speed"] is not None else None
+        retro = (speed is not None and speed < 0)
+        sign_idx, sign_name, deg_in_sign = zodiac_sign_from_longitude(lon_deg)
+        house_no = get_house_for_longitude(lon_deg, cusps_used)
+        planets_out.append({
+            "name": pname,
+            "longitude_deg": round(lon_deg, 6),
+            "latitude_deg": round(pos["lat"], 6),
+            "distance_au": round(dist, 6) if dist is not None else None,
+            "sign": sign_name,
+            "sign_index": sign_idx + 1,
+            "degree_in_sign": round(deg_in_sign, 6),
+            "house": house_no,
+            "retrograde": bool(retro)
+        })
+    return planets_out
+
+def generate_chart_variants(birth, ayanamsas=("LAHIRI",), house_systems=("WS",)):
+    """
+    Compute every (ayanamsa, house system) combination from one ephemeris pass.
+    Planet positions/speeds are computed once (tropical); each ayanamsa is a
+    constant offset and each house system a cusp reassignment. Placidus cusps
+    are only computed when a Placidus variant is requested.
 
-    maha, anta = calc_vimshottari_dasha(jd_ut_local)
+    Returns {"input": {...}, "variants": {"LAHIRI/WS": {...}, ...}} where each
+    variant has the same keys as generate_chart output (minus "input").
+    """
+    ayanamsas = [normalize_ayanamsa(a) for a in ayanamsas]
+    house_systems = [normalize_house_system(h) for h in house_systems]
+    inp = _chart_input(birth)
+    jd_ut = inp["julian_day_ut"]
+
+    need_placidus = "P" in house_systems
+    cusps_raw, ascmc = swe.houses(jd_ut, inp["latitude"], inp["longitude"], b'P' if need_placidus else b'E')
+    asc_trop = normalize_angle(ascmc[0])
+    placidus_trop = normalize_cusps_array_raw(cusps_raw) if need_placidus else None
+
+    tropical = compute_tropical_positions(jd_ut)
+
+    variants = {}
+    for ayanamsa in ayanamsas:
+        ayan, ayan_rate = ayanamsa_offset(jd_ut, ayanamsa)
+        asc_sid = normalize_angle(asc_trop - ayan)
+        asc_sign_index, asc_sign_name, asc_deg_in_sign = zodiac_sign_from_longitude(asc_sid)
+        # Dasha depends on the sidereal Moon, so it varies by ayanamsa but not by house system
+        moon = tropical.get("Moon", {})
+        moon_lon_sid = normalize_angle(moon["lon"] - ayan) if "lon" in moon else None
+        maha, anta = calc_vimshottari_dasha(jd_ut, moon_lon_sid)
+        strength = None  # independent of house system, so shared by every house system of this ayanamsa
+        for house_system in house_systems:
+            cusps_used = sidereal_cusps(house_system, asc_sid, placidus_trop, ayan)
+            planets_out = build_planets_out(tropical, ayan, ayan_rate, cusps_used)
+            ascendant = {
+                "longitude_deg": round(asc_sid, 6),
+                "sign": asc_sign_name,
+                "sign_index": asc_sign_index + 1,
+                "degree_in_sign": round(asc_deg_in_sign, 6)
+            }
+            if strength is None:
+                speeds = {name: pos["speed"] - ayan_rate for name, pos in tropical.items()
+                          if pos.get("speed") is not None}
+                strength = compute_strengths(planets_out, ascendant, speeds)
+            variants[f"{ayanamsa}/{house_system}"] = {
+                "ayanamsa": ayanamsa,
+                "ayanamsa_deg": round(ayan, 6),
+                "house_system": house_system,
+                "ascendant": ascendant,
+                "house_cusps_deg": build_house_cusps_dict(cusps_used),
+                "planets": planets_out,
+                "current_dasha": {"mahadasha": maha, "antardasha": anta},
+                "strength": strength,
+            }
+    return {"input": inp, "variants": variants}
+
+def generate_chart(birth, house_system='WS'):
+    house_system = normalize_house_system(house_system)
+    result = generate_chart_variants(birth, ayanamsas=("LAHIRI",), house_systems=(house_system,))
+    variant = result["variants"][f"LAHIRI/{house_system}"]
+    maha, anta = variant["current_dasha"]["mahadasha"], variant["current_dasha"]["antardasha"]
     print("Current dasha", maha, anta)
 
     out = {
-        "input": {
-            "local_datetime": local_dt.isoformat(),
-            "utc_datetime": utc_dt.isoformat(),
-            "timezone": birth["timezone"],
-            "latitude": lat, "longitude": lon, "altitude_m": alt,
-            "julian_day_ut": jd_ut_local
-        },
-        "ascendant": {
-            "longitude_deg": round(asc_sid, 6),
-            "sign": asc_sign_name,
-            "sign_index": asc_sign_index + 1,
-            "degree_in_sign": round(asc_deg_in_sign, 6)
-        },
-        "house_cusps_deg": build_house_cusps_dict(cusps_used),
-        "planets": planets_out,
-        "current_dasha": {"mahadasha": maha, "antardasha": anta},
+        "input": result["input"],
+        "ascendant": variant["ascendant"],
+        "house_cusps_deg": variant["house_cusps_deg"],
+        "planets": variant["planets"],
+        "current_dasha": variant["current_dasha"],
+        "strength": variant["strength"],
         # "notes": f"House system: {'Whole-Sign' if str(house_system).upper().startswith('W') else 'Placidus'} | Sidereal (Lahiri)"
     }
     print("Generated chart data",out)
@@ -0,0 +1,52 @@
+"""
+Benchmark: strength engine throughput per chart and per 10k charts.
+
+Run from backend/:
+    python -m astro.bench_strength [--repeat 2000] [--batch 10000]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from astro.strength import ashtakavarga, compute_strengths, shadbala, STRENGTH_PLANETS
+
+
+def _random_chart(rng):
+    lons = rng.uniform(0.0, 360.0, len(STRENGTH_PLANETS))
+    planets_out = [{"name": name, "longitude_deg": float(lon)} for name, lon in zip(STRENGTH_PLANETS, lons)]
+    speeds = {name: float(v) for name, v in zip(STRENGTH_PLANETS, rng.uniform(-0.5, 1.5, len(STRENGTH_PLANETS)))}
+    return planets_out, {"longitude_deg": float(rng.uniform(0.0, 360.0))}, speeds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=10_000)
+    args = parser.parse_args(argv)
+    rng = np.random.default_rng(0)
+
+    # Single chart through the generate_chart adapter (dicts in, dicts out)
+    planets_out, ascendant, speeds = _random_chart(rng)
+    compute_strengths(planets_out, ascendant, speeds)
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        compute_strengths(planets_out, ascendant, speeds)
+    per_chart = (time.perf_counter() - started) / args.repeat
+
+    # Batch path: arrays in, arrays out
+    lons = rng.uniform(0.0, 360.0, (args.batch, len(STRENGTH_PLANETS)))
+    asc = rng.uniform(0.0, 360.0, args.batch)
+    planet_speeds = rng.uniform(-0.5, 1.5, (args.batch, len(STRENGTH_PLANETS)))
+    started = time.perf_counter()
+    signs = (np.concatenate([lons, asc[:, None]], axis=1) // 30.0).astype(np.intp)
+    ashtakavarga(signs)
+    shadbala(lons, asc, planet_speeds)
+    per_batch = time.perf_counter() - started
+
+    print(f"single chart (adapter): {per_chart * 1e6:9.1f} us  ({1 / per_chart:,.0f} charts/s)")
+    print(f"{args.batch} charts (batch):  {per_batch * 1e3:9.1f} ms  ({args.batch / per_batch:,.0f} charts/s)")
+
+
+if __name__ == "__main__":
+    main()
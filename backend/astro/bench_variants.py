@@ -0,0 +1,49 @@
+"""
+Benchmark: N chart variants in one pass vs N separate single-variant charts.
+
+Run from backend/:
+    python -m astro.bench_variants [--repeat 200]
+"""
+import argparse
+import time
+
+from astro.astro import AYANAMSAS, generate_chart_variants
+
+SAMPLE = {
+    "year": 2003, "month": 5, "date": 7,
+    "hours": 23, "minutes": 30, "seconds": 0,
+    "timezone": "Asia/Kolkata",
+    "latitude": 25.3708, "longitude": 86.4734, "altitude_m": 216
+}
+HOUSE_SYSTEMS = ("WS", "P", "E")
+
+
+def _time_per_call(fn, repeat):
+    fn()  # warm ephemeris caches
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    ayanamsas = tuple(AYANAMSAS)
+    n = len(ayanamsas) * len(HOUSE_SYSTEMS)
+
+    single = _time_per_call(lambda: generate_chart_variants(SAMPLE, ("LAHIRI",), ("WS",)), args.repeat)
+    separate = _time_per_call(
+        lambda: [generate_chart_variants(SAMPLE, (a,), (h,)) for a in ayanamsas for h in HOUSE_SYSTEMS],
+        args.repeat)
+    one_pass = _time_per_call(lambda: generate_chart_variants(SAMPLE, ayanamsas, HOUSE_SYSTEMS), args.repeat)
+
+    print(f"single chart:            {single * 1e3:8.3f} ms")
+    print(f"{n} variants, separately: {separate * 1e3:8.3f} ms ({separate / single:.1f}x single)")
+    print(f"{n} variants, one pass:   {one_pass * 1e3:8.3f} ms ({one_pass / single:.1f}x single)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Planetary strength engine: Ashtakavarga bindus and the Shadbala components
+computable from chart positions and speeds.
+
+All rules are precomputed NumPy lookup tables, and every function accepts a leading
+batch dimension, so one call scores a single chart or many charts
+(e.g. a day of transits) without Python loops over planets or signs.
+
+Inputs use sidereal longitudes/speeds in STRENGTH_PLANETS order (Sun..Saturn) plus the ascendant;
+compute_strengths() adapts the planets_out/ascendant dicts produced by generate_chart.
+"""
+import numpy as np
+
+STRENGTH_PLANETS = ["Sun", "Moon", "Mars", "Mercury", "Jupiter", "Venus", "Saturn"]
+# Ashtakavarga contributors: the seven planets plus the Lagna
+CONTRIBUTORS = STRENGTH_PLANETS + ["Lagna"]
+
+# ---------------- Ashtakavarga ----------------
+# Benefic houses (counted from the contributor) for each planet's Bhinnashtakavarga (Parashara).
+BENEFIC_HOUSES = {
+    "Sun": {
+        "Sun": [1, 2, 4, 7, 8, 9, 10, 11], "Moon": [3, 6, 10, 11], "Mars": [1, 2, 4, 7, 8, 9, 10, 11],
+        "Mercury": [3, 5, 6, 9, 10, 11, 12], "Jupiter": [5, 6, 9, 11], "Venus": [6, 7, 12],
+        "Saturn": [1, 2, 4, 7, 8, 9, 10, 11], "Lagna": [3, 4, 6, 10, 11, 12],
+    },
+    "Moon": {
+        "Sun": [3, 6, 7, 8, 10, 11], "Moon": [1, 3, 6, 7, 10, 11], "Mars": [2, 3, 5, 6, 9, 10, 11],
+        "Mercury": [1, 3, 4, 5, 7, 8, 10, 11], "Jupiter": [1, 4, 7, 8, 10, 11, 12],
+        "Venus": [3, 4, 5, 7, 9, 10, 11], "Saturn": [3, 5, 6, 11], "Lagna": [3, 6, 10, 11],
+    },
+    "Mars": {
+        "Sun": [3, 5, 6, 10, 11], "Moon": [3, 6, 11], "Mars": [1, 2, 4, 7, 8, 10, 11],
+        "Mercury": [3, 5, 6, 11], "Jupiter": [6, 10, 11, 12], "Venus": [6, 8, 11, 12],
+        "Saturn": [1, 4, 7, 8, 9, 10, 11], "Lagna": [1, 3, 6, 10, 11],
+    },
+    "Mercury": {
+        "Sun": [5, 6, 9, 11, 12], "Moon": [2, 4, 6, 8, 10, 11], "Mars": [1, 2, 4, 7, 8, 9, 10, 11],
+        "Mercury": [1, 3, 5, 6, 9, 10, 11, 12], "Jupiter": [6, 8, 11, 12],
+        "Venus": [1, 2, 3, 4, 5, 8, 9, 11], "Saturn": [1, 2, 4, 7, 8, 9, 10, 11],
+        "Lagna": [1, 2, 4, 6, 8, 10, 11],
+    },
+    "Jupiter": {
+        "Sun": [1, 2, 3, 4, 7, 8, 9, 10, 11], "Moon": [2, 5, 7, 9, 11], "Mars": [1, 2, 4, 7, 8, 10, 11],
+        "Mercury": [1, 2, 4, 5, 6, 9, 10, 11], "Jupiter": [1, 2, 3, 4, 7, 8, 10, 11],
+        "Venus": [2, 5, 6, 9, 10, 11], "Saturn": [3, 5, 6, 12], "Lagna": [1, 2, 4, 5, 6, 7, 9, 10, 11],
+    },
+    "Venus": {
+        "Sun": [8, 11, 12], "Moon": [1, 2, 3, 4, 5, 8, 9, 11, 12], "Mars": [3, 5, 6, 9, 11, 12],
+        "Mercury": [3, 5, 6, 9, 11], "Jupiter": [5, 8, 9, 10, 11], "Venus": [1, 2, 3, 4, 5, 8, 9, 10, 11],
+        "Saturn": [3, 4, 5, 8, 9, 10, 11], "Lagna": [1, 2, 3, 4, 5, 8, 9, 11],
+    },
+    "Saturn": {
+        "Sun": [1, 2, 4, 7, 8, 10, 11], "Moon": [3, 6, 11], "Mars": [3, 5, 6, 10, 11, 12],
+        "Mercury": [6, 8, 9, 10, 11, 12], "Jupiter": [5, 6, 11, 12], "Venus": [6, 11, 12],
+        "Saturn": [3, 5, 6, 11], "Lagna": [1, 3, 4, 6, 10, 11],
+    },
+}
+
+
+def _build_ashtakavarga_lookup():
+    """
+    ASHTAKAVARGA_LOOKUP[c, s, p, k] = 1 if contributor c placed in sign s gives
+    planet p a bindu in sign k, i.e. the benefic table pre-rotated for every sign.
+    """
+    base = np.zeros((len(CONTRIBUTORS), len(STRENGTH_PLANETS), 12), dtype=np.int16)
+    for p, planet in enumerate(STRENGTH_PLANETS):
+        for c, contributor in enumerate(CONTRIBUTORS):
+            base[c, p, [h - 1 for h in BENEFIC_HOUSES[planet][contributor]]] = 1
+    signs = np.arange(12)
+    offsets = (signs[None, :] - signs[:, None]) % 12  # [s, k] -> house offset of k from s
+    return np.ascontiguousarray(base[:, :, offsets].transpose(0, 2, 1, 3))
+
+
+ASHTAKAVARGA_LOOKUP = _build_ashtakavarga_lookup()
+_CONTRIBUTOR_IDX = np.arange(len(CONTRIBUTORS))
+
+
+def ashtakavarga(contributor_signs):
+    """
+    contributor_signs: int array (..., 8) of 0-based signs in CONTRIBUTORS order.
+    Returns (bhinna (..., 7, 12), sarva (..., 12)) bindu counts indexed by sign.
+    """
+    signs = np.asarray(contributor_signs, dtype=np.intp) % 12
+    bhinna = ASHTAKAVARGA_LOOKUP[_CONTRIBUTOR_IDX, signs].sum(axis=-3)
+    return bhinna, bhinna.sum(axis=-2)
+
+
+# ---------------- Shadbala ----------------
+# Deep exaltation points (sidereal degrees); debilitation is opposite
+EXALTATION_DEG = np.array([10.0, 33.0, 298.0, 165.0, 95.0, 357.0, 200.0])
+DEBILITATION_DEG = (EXALTATION_DEG + 180.0) % 360.0
+
+# Dig bala: offset from the ascendant of each planet's powerless point
+# (Sun/Mars strongest in 10th, Moon/Venus in 4th, Mercury/Jupiter in 1st, Saturn in 7th)
+DIG_POWERLESS_OFFSET = np.array([90.0, 270.0, 90.0, 180.0, 180.0, 270.0, 0.0])
+
+# Ojayugmarasyamsa: Moon and Venus gain in even signs, the rest in odd signs (0-based even = odd sign)
+_ODD_SIGN = np.arange(12) % 2 == 0
+OJAYUGMA_LOOKUP = np.where(
+    np.array([p in ("Moon", "Venus") for p in STRENGTH_PLANETS])[:, None], ~_ODD_SIGN, _ODD_SIGN
+) * 15.0
+
+# Kendradi bala by house from the ascendant sign: kendra 60, panaphara 30, apoklima 15
+KENDRADI_LOOKUP = np.array([60.0, 30.0, 15.0] * 4)
+
+# Paksha bala: benefics gain with the Sun-Moon elongation, malefics lose; the Moon's value is doubled
+PAKSHA_BENEFIC = np.array([False, True, False, True, True, True, False])
+PAKSHA_MULTIPLIER = np.array([1.0, 2.0, 1.0, 1.0, 1.0, 1.0, 1.0])
+
+NAISARGIKA_BALA = np.array([60.0, 51.43, 17.14, 25.71, 34.29, 42.86, 8.57])
+
+# Cheshta bala, approximated from the speed ratio to the mean daily motion (deg/day)
+# with the classical motion states. Sun and Moon get none: their cheshta is replaced
+# by ayana and paksha bala. Anuvakra needs the previous station and is not distinguished.
+MEAN_DAILY_MOTION = np.array([0.9856, 13.1764, 0.5240, 0.9856, 0.0831, 0.9856, 0.0335])
+HAS_CHESHTA = np.array([False, False, True, True, True, True, True])
+# Ratio bins: vikala (stationary) < 0.05 <= mandatara < 0.5 <= manda < 0.9 <= sama < 1.1 <= chara < 1.5 <= atichara
+CHESHTA_RATIO_BINS = np.array([0.05, 0.5, 0.9, 1.1, 1.5])
+CHESHTA_DIRECT_LOOKUP = np.array([15.0, 15.0, 30.0, 7.5, 45.0, 30.0])
+CHESHTA_VAKRA = 60.0
+
+SHADBALA_COMPONENTS = ["uchcha", "ojayugma", "kendradi", "dig", "paksha", "naisargika", "cheshta"]
+_PLANET_IDX = np.arange(len(STRENGTH_PLANETS))
+
+
+def _arc(a, b):
+    """Shortest angular distance in degrees (0..180)."""
+    d = np.abs(a - b) % 360.0
+    return np.minimum(d, 360.0 - d)
+
+
+def cheshta_bala(planet_speeds):
+    """planet_speeds: (..., 7) sidereal speeds in deg/day. Returns (..., 7) virupas."""
+    speeds = np.asarray(planet_speeds, dtype=float)
+    direct = CHESHTA_DIRECT_LOOKUP[np.digitize(speeds / MEAN_DAILY_MOTION, CHESHTA_RATIO_BINS)]
+    return np.where(HAS_CHESHTA, np.where(speeds < 0, CHESHTA_VAKRA, direct), 0.0)
+
+
+def shadbala(planet_lons, asc_lon, planet_speeds):
+    """
+    planet_lons, planet_speeds: (..., 7) sidereal longitudes and speeds (deg/day) in
+    STRENGTH_PLANETS order; asc_lon: (...).
+    Returns {component: (..., 7) virupas} plus "partial_total". This is NOT full
+    Shadbala: saptavargaja and drik bala need divisional charts and aspect strengths,
+    and most of kala bala needs sunrise/sunset and weekday/hora lords, none of which
+    generate_chart computes. partial_total must not be read as a strength ranking.
+    """
+    lons = np.asarray(planet_lons, dtype=float) % 360.0
+    asc = np.asarray(asc_lon, dtype=float)[..., None] % 360.0
+    signs = (lons // 30.0).astype(np.intp)
+    navamsas = (lons // (30.0 / 9.0)).astype(np.intp) % 12
+    asc_sign = (asc // 30.0).astype(np.intp)
+
+    elongation = _arc(lons[..., 1], lons[..., 0])[..., None]
+    components = {
+        "uchcha": _arc(lons, DEBILITATION_DEG) / 3.0,
+        "ojayugma": OJAYUGMA_LOOKUP[_PLANET_IDX, signs] + OJAYUGMA_LOOKUP[_PLANET_IDX, navamsas],
+        "kendradi": KENDRADI_LOOKUP[(signs - asc_sign) % 12],
+        "dig": _arc(lons, asc + DIG_POWERLESS_OFFSET) / 3.0,
+        "paksha": np.where(PAKSHA_BENEFIC, elongation / 3.0, 60.0 - elongation / 3.0) * PAKSHA_MULTIPLIER,
+        "naisargika": np.broadcast_to(NAISARGIKA_BALA, lons.shape),
+        "cheshta": cheshta_bala(planet_speeds),
+    }
+    components["partial_total"] = sum(components[name] for name in SHADBALA_COMPONENTS)
+    return components
+
+
+# ---------------- Chart adapter ----------------
+def compute_strengths(planets_out, ascendant, speeds):
+    """
+    Strength summary for one chart from generate_chart's planets_out and ascendant,
+    plus sidereal speeds {planet name: deg/day}.
+    Bindu lists are indexed by sign, Aries first. Returns None if any of the
+    seven planets failed to compute.
+    """
+    by_name = {p["name"]: p for p in planets_out}
+    if any("longitude_deg" not in by_name.get(name, {}) or speeds.get(name) is None for name in STRENGTH_PLANETS):
+        return None
+    lons = np.array([by_name[name]["longitude_deg"] for name in STRENGTH_PLANETS])
+    planet_speeds = np.array([speeds[name] for name in STRENGTH_PLANETS])
+    asc_lon = float(ascendant["longitude_deg"])
+
+    contributor_signs = np.append(lons // 30.0, asc_lon // 30.0).astype(np.intp)
+    bhinna, sarva = ashtakavarga(contributor_signs)
+    bala = shadbala(lons, asc_lon, planet_speeds)
+    return {
+        "sarvashtakavarga": [int(b) for b in sarva],
+        "bhinnashtakavarga": {name: [int(b) for b in bhinna[p]] for p, name in enumerate(STRENGTH_PLANETS)},
+        "shadbala_partial_virupas": {
+            name: {c: round(float(bala[c][p]), 2) for c in SHADBALA_COMPONENTS + ["partial_total"]}
+            for p, name in enumerate(STRENGTH_PLANETS)
+        },
+    }
@@ -0,0 +1,278 @@
+"""
+Batch scan for upcoming dasha transitions across stored sessions.
+
+Each session with birth details carries its next antardasha/mahadasha boundary
+as an indexed Julian day (next_dasha_transition_jd, mirrored as a datetime), plus the birth Moon longitude ("dasha_anchor") so that
+advancing to the following boundary is pure arithmetic (no ephemeris call).
+/kundli sets these fields from the chart it has just computed. A run touches:
+  1. sessions that have never been scheduled (backfill, one Moon calc each;
+     CLI only, since swisseph calls would block the web worker's event loop), and
+  2. sessions whose stored transition falls before now + window (range query on
+     the JD float, the same value advance_session compares against; the BSON
+     datetime is truncated to milliseconds and would disagree at the boundary).
+
+Processed sessions always leave the query range (their transition moves past
+the horizon), so re-running after a crash simply resumes with what is left.
+
+CLI usage:
+    python dasha_scheduler.py run [--window-days 7] [--batch-size 1000]
+    python dasha_scheduler.py bench [--sessions 1000000]
+"""
+import argparse
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from pymongo import UpdateOne
+
+from astro.astro import (
+    birth_to_jd_ut, moon_sidereal_longitude, next_dasha_transition,
+    jd_to_datetime, datetime_to_jd,
+)
+
+logger = logging.getLogger("nakshatra-backend")
+
+NOTIFICATIONS_COLLECTION = "dasha_notifications"
+DEFAULT_WINDOW_DAYS = 7
+BATCH_SIZE = 1000
+
+DASHA_FIELDS = ("next_dasha_transition", "next_dasha_transition_jd", "next_dasha", "dasha_anchor", "dasha_error")
+TRANSITION_PROJECTION = {"session_id": 1, "dasha_anchor": 1, "next_dasha_transition_jd": 1, "next_dasha": 1}
+
+
+# ---------------- Indexes ----------------
+async def ensure_dasha_indexes(db):
+    await db["sessions"].create_index([("next_dasha_transition_jd", 1), ("_id", 1)])
+    await db[NOTIFICATIONS_COLLECTION].create_index([("session_id", 1), ("transition_at", 1)], unique=True)
+
+
+# ---------------- Per-session computation ----------------
+def _transition_fields(transition: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if transition is None:
+        return {"next_dasha_transition": None, "next_dasha_transition_jd": None, "next_dasha": None}
+    return {
+        "next_dasha_transition": jd_to_datetime(transition["jd"]),
+        "next_dasha_transition_jd": transition["jd"],
+        "next_dasha": {
+            "mahadasha": transition["mahadasha"],
+            "antardasha": transition["antardasha"],
+            "mahadasha_change": transition["mahadasha_change"],
+        },
+    }
+
+
+def schedule_from_anchor(jd_ut: float, moon_lon: float, now_jd: float) -> Dict[str, Any]:
+    """Fields to $set for a session given its birth JD and sidereal (Lahiri) Moon longitude."""
+    fields = _transition_fields(next_dasha_transition(jd_ut, moon_lon, now_jd))
+    fields["dasha_anchor"] = {"jd_ut": jd_ut, "moon_lon": moon_lon}
+    return fields
+
+
+def schedule_from_birth(birth: Dict[str, Any], now_jd: float) -> Dict[str, Any]:
+    """Fields to $set for a session that has not been scheduled yet (one Moon ephemeris call)."""
+    _, _, jd_ut = birth_to_jd_ut(birth)
+    return schedule_from_anchor(jd_ut, moon_sidereal_longitude(jd_ut), now_jd)
+
+
+def schedule_from_chart(chart: Dict[str, Any], now: datetime) -> Optional[Dict[str, Any]]:
+    """Fields to $set from generate_chart output, reusing its Moon; None if the Moon failed."""
+    moon = next((p for p in chart.get("planets", []) if p.get("name") == "Moon"), {})
+    if "longitude_deg" not in moon:
+        return None
+    return schedule_from_anchor(chart["input"]["julian_day_ut"], moon["longitude_deg"], datetime_to_jd(now))
+
+
+def advance_session(doc: Dict[str, Any], now_jd: float, horizon_jd: float):
+    """
+    Walk a due session past the horizon.
+    Returns (fields to $set, list of notifications for transitions in (now, horizon]).
+    """
+    anchor = doc["dasha_anchor"]
+    transition = {"jd": doc["next_dasha_transition_jd"], **doc["next_dasha"]}
+    notifications = []
+    # Several boundaries can fall in one window (short antardashas, or missed runs)
+    while transition is not None and transition["jd"] <= horizon_jd:
+        if transition["jd"] > now_jd:
+            notifications.append({
+                "session_id": doc["session_id"],
+                "transition_at": jd_to_datetime(transition["jd"]),
+                "mahadasha": transition["mahadasha"],
+                "antardasha": transition["antardasha"],
+                "mahadasha_change": transition["mahadasha_change"],
+            })
+        transition = next_dasha_transition(anchor["jd_ut"], anchor["moon_lon"], transition["jd"])
+    return _transition_fields(transition), notifications
+
+
+# ---------------- Batch phases ----------------
+async def backfill_transitions(db, now: datetime, batch_size: int = BATCH_SIZE) -> int:
+    """Schedule sessions with birth details but no transition field yet."""
+    sessions = db["sessions"]
+    query = {"birth_details": {"$ne": None}, "next_dasha_transition": {"$exists": False}}
+    now_jd = datetime_to_jd(now)
+    processed = 0
+    while True:
+        docs = await sessions.find(query, {"birth_details": 1}).limit(batch_size).to_list(length=batch_size)
+        if not docs:
+            return processed
+        ops = []
+        for doc in docs:
+            try:
+                fields = schedule_from_birth(doc["birth_details"], now_jd)
+            except Exception as e:
+                # Park unparseable birth details so they do not block later batches
+                fields = {**_transition_fields(None), "dasha_error": str(e)}
+            # Conditional on what was read: /kundli may have rescheduled the session meanwhile
+            ops.append(UpdateOne({"_id": doc["_id"], "next_dasha_transition": {"$exists": False},
+                                  "birth_details": doc["birth_details"]}, {"$set": fields}))
+        await sessions.bulk_write(ops, ordered=False)
+        processed += len(ops)
+
+
+async def scan_due_transitions(db, now: datetime, window: timedelta, batch_size: int = BATCH_SIZE) -> Dict[str, int]:
+    """Queue notifications for transitions in (now, now + window] and advance those sessions."""
+    sessions = db["sessions"]
+    notifications_coll = db[NOTIFICATIONS_COLLECTION]
+    horizon = now + window
+    now_jd, horizon_jd = datetime_to_jd(now), datetime_to_jd(horizon)
+    query = {"next_dasha_transition_jd": {"$ne": None, "$lte": horizon_jd}}
+    stats = {"advanced": 0, "notifications": 0}
+    while True:
+        docs = await (sessions.find(query, TRANSITION_PROJECTION)
+                      .sort([("next_dasha_transition_jd", 1), ("_id", 1)])
+                      .limit(batch_size)
+                      .to_list(length=batch_size))
+        if not docs:
+            return stats
+        ops, notes = [], []
+        progressed = 0
+        for doc in docs:
+            fields, doc_notes = advance_session(doc, now_jd, horizon_jd)
+            if fields["next_dasha_transition_jd"] != doc["next_dasha_transition_jd"]:
+                progressed += 1
+            # Conditional on what was read: /kundli may have rescheduled the session meanwhile
+            ops.append(UpdateOne({"_id": doc["_id"], "next_dasha_transition_jd": doc["next_dasha_transition_jd"]},
+                                 {"$set": fields}))
+            notes.extend(doc_notes)
+        if not progressed:
+            # Nothing would leave the query range; stop rather than re-fetch the same batch forever
+            logger.error("Dasha scan made no progress on a batch of %d sessions; stopping", len(docs))
+            return stats
+        # Notifications first: if we crash before advancing, the rerun upserts the same keys
+        if notes:
+            await notifications_coll.bulk_write([
+                UpdateOne({"session_id": n["session_id"], "transition_at": n["transition_at"]},
+                          {"$setOnInsert": {**n, "created_at": now}}, upsert=True)
+                for n in notes
+            ], ordered=False)
+        await sessions.bulk_write(ops, ordered=False)
+        stats["advanced"] += len(ops)
+        stats["notifications"] += len(notes)
+
+
+async def run_dasha_scan(db, now: Optional[datetime] = None, window_days: float = DEFAULT_WINDOW_DAYS,
+                         batch_size: int = BATCH_SIZE) -> Dict[str, Any]:
+    now = now or datetime.now(timezone.utc)
+    started = time.perf_counter()
+    backfilled = await backfill_transitions(db, now, batch_size)
+    stats = await scan_due_transitions(db, now, timedelta(days=window_days), batch_size)
+    stats["backfilled"] = backfilled
+    stats["elapsed_s"] = round(time.perf_counter() - started, 3)
+    logger.info("Dasha scan finished: %s", stats)
+    return stats
+
+
+async def periodic_dasha_scan(db, interval_hours: float, window_days: float = DEFAULT_WINDOW_DAYS):
+    """
+    Background loop started from the app lifespan; failures are logged and retried next interval.
+    Only runs the cheap due scan; backfill existing sessions with `python dasha_scheduler.py run`.
+    """
+    while True:
+        try:
+            stats = await scan_due_transitions(db, datetime.now(timezone.utc), timedelta(days=window_days))
+            logger.info("Dasha due scan finished: %s", stats)
+        except Exception:
+            logger.exception("Dasha scan failed (will retry next interval)")
+        await asyncio.sleep(interval_hours * 3600)
+
+
+# ---------------- Benchmark ----------------
+def _synthetic_birth(rng: random.Random) -> Dict[str, Any]:
+    return {
+        "year": rng.randint(1950, 2010), "month": rng.randint(1, 12), "date": rng.randint(1, 28),
+        "hours": rng.randint(0, 23), "minutes": rng.randint(0, 59), "seconds": 0,
+        "timezone": "Asia/Kolkata",
+        "latitude": rng.uniform(8.0, 35.0), "longitude": rng.uniform(68.0, 97.0),
+    }
+
+
+async def bench(db, n_sessions: int, window_days: float, batch_size: int) -> None:
+    """Seed a synthetic sessions collection in a scratch database and time backfill + scan."""
+    await db["sessions"].drop()
+    await db[NOTIFICATIONS_COLLECTION].drop()
+    await ensure_dasha_indexes(db)
+
+    rng = random.Random(42)
+    now = datetime.now(timezone.utc)
+    started = time.perf_counter()
+    for offset in range(0, n_sessions, 10_000):
+        docs: List[Dict[str, Any]] = [
+            {"session_id": f"bench-{i}", "birth_details": _synthetic_birth(rng), "messages": [],
+             "created_at": now, "updated_at": now}
+            for i in range(offset, min(offset + 10_000, n_sessions))
+        ]
+        await db["sessions"].insert_many(docs, ordered=False)
+    logger.info("Seeded %d sessions in %.1fs", n_sessions, time.perf_counter() - started)
+
+    started = time.perf_counter()
+    backfilled = await backfill_transitions(db, now, batch_size)
+    elapsed = time.perf_counter() - started
+    logger.info("Backfill: %d sessions in %.1fs (%.0f sessions/s)", backfilled, elapsed, backfilled / elapsed)
+
+    # Daily runs: only sessions with a transition inside the window are read
+    for day in range(3):
+        run_now = now + timedelta(days=day)
+        started = time.perf_counter()
+        stats = await scan_due_transitions(db, run_now, timedelta(days=window_days), batch_size)
+        elapsed = time.perf_counter() - started
+        logger.info("Scan day %d: %s in %.2fs (%.0f sessions/s)", day, stats, elapsed,
+                    stats["advanced"] / elapsed if elapsed else 0.0)
+
+
+def main(argv=None):
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from database import MONGODB_URI, DATABASE_NAME
+
+    parser = argparse.ArgumentParser(description="Scan sessions for upcoming dasha transitions")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="Backfill and scan the sessions collection once")
+    run.add_argument("--window-days", type=float, default=DEFAULT_WINDOW_DAYS)
+    run.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    b = sub.add_parser("bench", help="Measure throughput on a synthetic collection")
+    b.add_argument("--sessions", type=int, default=1_000_000)
+    b.add_argument("--window-days", type=float, default=DEFAULT_WINDOW_DAYS)
+    b.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    b.add_argument("--database", default=f"{DATABASE_NAME}_dasha_bench", help="Scratch database (dropped and reseeded)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    async def _main():
+        client = AsyncIOMotorClient(MONGODB_URI)
+        try:
+            if args.command == "run":
+                db = client[DATABASE_NAME]
+                await ensure_dasha_indexes(db)
+                await run_dasha_scan(db, window_days=args.window_days, batch_size=args.batch_size)
+            else:
+                await bench(client[args.database], args.sessions, args.window_days, args.batch_size)
+        finally:
+            client.close()
+
+    asyncio.run(_main())
+
+
+if __name__ == "__main__":
+    main()
@@ -28,10 +28,17 @@ async def connect_to_mongo():
         # Test connection
         await motor_client.admin.command('ping')
         logger.info(f"Successfully connected to MongoDB: {DATABASE_NAME}")
+        await ensure_indexes()
     except Exception as e:
         logger.error(f"Failed to connect to MongoDB: {e}")
         raise e
 
+async def ensure_indexes():
+    """Create indexes used by lookups and incremental exports (no-op if they exist)"""
+    sessions = database["sessions"]
+    await sessions.create_index("session_id")
+    await sessions.create_index([("updated_at", 1), ("session_id", 1)])
+
 async def close_mongo_connection():
     """Close MongoDB connection on shutdown"""
     global motor_client
@@ -1,15 +1,18 @@
 import os
 import json
+import hmac
+import asyncio
 import logging
 from typing import Any, Dict, Optional
 from datetime import datetime, timezone
 from threading import Lock
 from contextlib import asynccontextmanager
 
+import pytz
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from langchain_groq import ChatGroq
 from langchain.chains import ConversationChain
@@ -17,9 +20,11 @@ from langchain.memory import ConversationBufferMemory
 from langchain.schema import SystemMessage
 
 # from api.astrology import get_kundli_data // Can use freeastrologyapi.com to get kundli data
-from astro.astro import generate_chart
-from database import connect_to_mongo, close_mongo_connection, get_sessions_collection
+from astro.astro import generate_chart, generate_chart_variants
+from database import connect_to_mongo, close_mongo_connection, get_sessions_collection, get_database
+from dasha_scheduler import ensure_dasha_indexes, periodic_dasha_scan, schedule_from_chart, DASHA_FIELDS
 from models import SessionData, Message
+from sessions_export import aiter_export_lines, zstd_chunks_async, parse_watermark, export_upper_bound
 
 # ----- Logging -----
 logging.basicConfig(level=logging.INFO)
@@ -30,8 +35,20 @@ logger = logging.getLogger("nakshatra-backend")
 async def lifespan(app: FastAPI):
     # Startup
     await connect_to_mongo()
+    # Opt-in background scan for upcoming dasha transitions (run one worker with this set)
+    dasha_scan_task = None
+    dasha_scan_hours = os.getenv("DASHA_SCAN_INTERVAL_HOURS")
+    if dasha_scan_hours:
+        await ensure_dasha_indexes(get_database())
+        dasha_scan_task = asyncio.create_task(periodic_dasha_scan(get_database(), float(dasha_scan_hours)))
     yield
     # Shutdown
+    if dasha_scan_task:
+        dasha_scan_task.cancel()
+        try:
+            await dasha_scan_task
+        except asyncio.CancelledError:
+            pass
     await close_mongo_connection()
 
 # ----- App -----
@@ -61,6 +78,10 @@ if not GROQ_API_KEY:
     logger.error("GROQ_API_KEY is not set")
     raise RuntimeError("GROQ_API_KEY environment variable is required")
 
+ADMIN_API_KEY = os.getenv("ADMIN_API_KEY")
+if not ADMIN_API_KEY:
+    logger.warning("ADMIN_API_KEY is not set; admin endpoints are disabled")
+
 # ----- Shared LLM client -----
 llm = ChatGroq(model="openai/gpt-oss-20B", api_key=GROQ_API_KEY)
 
@@ -116,7 +137,9 @@ def build_kundli_prompt(kundli: Dict[str, Any], today: datetime) -> str:
         "### Core Rules\n"
         "1. NEVER ask the user for birth details (they are already included) Output in clean Markdown;.\n"
         "2. DO NOT recalculate Mahadasha or Antardasha. Use the given data only.\n"
-        "3. For personality/tendencies use planetary placements; for time-based queries use dashas.\n"
+        "3. For personality/tendencies use planetary placements; for time-based queries use dashas; "
+        "for planetary strength use the given Ashtakavarga bindus and partial Shadbala components "
+        "(partial_total omits several Shadbala components, so never present it as a full strength ranking).\n"
         "4. RESPOND VERY CONCISELY and only include major insights.\n"
         "5. OUTPUT FORMAT (MUST follow exactly):\n"
         "   - First line: single-sentence summary (<= 30 words).\n"
@@ -179,6 +202,14 @@ async def kundli(request: Request):
         full_name = payload.get("fullName", "Unknown")
         
         logger.info("Attempting to save kundli data: full_name=%s, session_id=%s", full_name, session_id)
+
+        # Schedule the next dasha transition from the Moon already in the chart
+        dasha_fields = None
+        try:
+            dasha_fields = schedule_from_chart(json.loads(kundli), datetime.now(timezone.utc))
+        except Exception:
+            logger.exception("Failed to schedule dasha transition (non-fatal; CLI backfill will retry)")
+        dasha_fields = dasha_fields or {}
         
         # Check if session already exists
         existing_session = await sessions_collection.find_one({"session_id": session_id})
@@ -190,8 +221,11 @@ async def kundli(request: Request):
                 {"$set": {
                     "full_name": full_name,
                     "birth_details": payload,
-                    "updated_at": datetime.now(timezone.utc)
-                }}
+                    "updated_at": datetime.now(timezone.utc),
+                    **dasha_fields
+                },
+                 # Drop stale dasha fields; unscheduled sessions are picked up by the CLI backfill
+                 "$unset": {f: "" for f in DASHA_FIELDS if f not in dasha_fields}}
             )
             logger.info("Updated session with birth data for session_id=%s, matched=%s, modified=%s", 
                        session_id, result.matched_count, result.modified_count)
@@ -202,7 +236,7 @@ async def kundli(request: Request):
                 full_name=full_name,
                 birth_details=payload,
             )
-            result = await sessions_collection.insert_one(session_doc.dict())
+            result = await sessions_collection.insert_one({**session_doc.dict(), **dasha_fields})
             logger.info("Created new session with birth data for session_id=%s, inserted_id=%s", 
                        session_id, result.inserted_id)
     except Exception as e:
@@ -232,6 +266,45 @@ async def kundli(request: Request):
     return JSONResponse(content={"response": llm_resp.content.strip()})
 
 
+@app.post("/kundli/variants")
+async def kundli_variants(request: Request):
+    """
+    Compare chart variants for the same birth details.
+    Expects the /kundli birth payload plus optional lists 'ayanamsas'
+    (LAHIRI, RAMAN, KP) and 'house_systems' (WS, P, E).
+    Returns raw chart data only (no LLM summary, nothing stored).
+    """
+    try:
+        payload = await request.json()
+    except Exception:
+        logger.exception("Invalid JSON in /kundli/variants")
+        raise HTTPException(status_code=400, detail="Invalid JSON payload")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="JSON payload must be an object")
+
+    ayanamsas = payload.get("ayanamsas") or ["LAHIRI"]
+    house_systems = payload.get("house_systems") or ["WS"]
+    # Accept a lone value as a one-item list; anything else must already be a list
+    if isinstance(ayanamsas, str):
+        ayanamsas = [ayanamsas]
+    if isinstance(house_systems, str):
+        house_systems = [house_systems]
+    if not isinstance(ayanamsas, list) or not isinstance(house_systems, list):
+        raise HTTPException(status_code=400, detail="'ayanamsas' and 'house_systems' must be lists")
+    try:
+        result = generate_chart_variants(payload, ayanamsas=ayanamsas, house_systems=house_systems)
+    except pytz.UnknownTimeZoneError as e:
+        raise HTTPException(status_code=400, detail=f"Unknown timezone {e}")
+    except (ValueError, TypeError) as e:
+        # Missing/out-of-range fields raise ValueError, non-numeric ones TypeError
+        raise HTTPException(status_code=400, detail=f"Invalid birth details: {e}")
+    except Exception:
+        logger.exception("Failed to generate kundli variants")
+        raise HTTPException(status_code=500, detail="Failed to generate kundli variants")
+
+    return JSONResponse(content=result)
+
+
 @app.post("/chat")
 async def chat(request: Request):
     """
@@ -322,6 +395,35 @@ async def chat(request: Request):
 
     return JSONResponse(content={"response": resp_text})
 
+
+@app.get("/admin/sessions/export")
+async def export_sessions_ndjson(request: Request, since: Optional[str] = None,
+                                 compress: Optional[str] = None, include_messages: bool = True):
+    """
+    Stream the sessions collection as NDJSON (or zstd-compressed NDJSON with compress=zstd).
+    Requires header 'X-Admin-Key'. Pass the X-Export-Watermark response header as
+    `since` on the next call for an incremental export.
+    """
+    # Compare bytes: header values are latin-1 decoded, and compare_digest rejects non-ASCII str
+    provided = request.headers.get("x-admin-key", "").encode("utf-8")
+    if not ADMIN_API_KEY or not hmac.compare_digest(provided, ADMIN_API_KEY.encode("utf-8")):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+    try:
+        since_dt = parse_watermark(since)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid 'since' watermark; expected ISO-8601")
+    if compress not in (None, "zstd"):
+        raise HTTPException(status_code=400, detail="Unsupported compression; use 'zstd'")
+
+    until = export_upper_bound()
+    lines = aiter_export_lines(get_sessions_collection(), since_dt, until, include_messages=include_messages)
+    headers = {"X-Export-Watermark": until.isoformat()}
+    if compress == "zstd":
+        headers["Content-Disposition"] = 'attachment; filename="sessions.ndjson.zst"'
+        return StreamingResponse(zstd_chunks_async(lines), media_type="application/zstd", headers=headers)
+    return StreamingResponse(lines, media_type="application/x-ndjson", headers=headers)
+
 # Only for local testing; use uvicorn command line in production
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,262 @@
+"""
+Streaming NDJSON export/import of the `sessions` collection.
+
+Documents are read through a batched cursor and written one line at a time,
+so memory stays bounded by a single batch regardless of collection size.
+Output is plain NDJSON or zstd-compressed NDJSON (".zst").
+
+Incremental exports use an `updated_at` watermark: each run exports documents
+with since < updated_at <= until and reports `until` as the next watermark.
+`until` trails the clock by WATERMARK_LAG, because `updated_at` is stamped by
+the app before its write commits (and possibly on another host). Guarantee:
+every write that commits within WATERMARK_LAG of its `updated_at` stamp, on
+hosts whose clocks are within that lag, lands in exactly one export window.
+
+CLI usage:
+    python sessions_export.py export --out sessions.ndjson.zst [--since ISO] [--no-messages]
+    python sessions_export.py import --in sessions.ndjson.zst
+"""
+import argparse
+import io
+import logging
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, Optional
+
+import orjson
+import zstandard
+from pymongo import MongoClient, UpdateOne
+
+from database import MONGODB_URI, DATABASE_NAME
+
+logger = logging.getLogger("nakshatra-backend")
+
+BATCH_SIZE = 500
+ZSTD_LEVEL = 3
+DATETIME_FIELDS = ("created_at", "updated_at")
+# Slack for commit latency and clock skew between updated_at stamping and the export
+WATERMARK_LAG = timedelta(seconds=60)
+
+
+# ---------------- Query helpers ----------------
+def parse_watermark(value: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO-8601 watermark; naive values are treated as UTC."""
+    if not value:
+        return None
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+def export_upper_bound() -> datetime:
+    """Upper bound (and next watermark) for an export started now."""
+    return datetime.now(timezone.utc) - WATERMARK_LAG
+
+
+def build_export_query(since: Optional[datetime], until: datetime) -> Dict[str, Any]:
+    window: Dict[str, Any] = {"$lte": until}
+    if since is not None:
+        window["$gt"] = since
+    return {"updated_at": window}
+
+
+def build_projection(include_messages: bool = True) -> Dict[str, int]:
+    projection = {
+        "_id": 0,
+        "session_id": 1,
+        "full_name": 1,
+        "birth_details": 1,
+        "created_at": 1,
+        "updated_at": 1,
+    }
+    if include_messages:
+        projection["messages"] = 1
+    return projection
+
+
+EXPORT_SORT = [("updated_at", 1), ("session_id", 1)]
+
+
+# ---------------- Encoding ----------------
+def encode_line(doc: Dict[str, Any]) -> bytes:
+    # pymongo returns naive UTC datetimes; OPT_NAIVE_UTC keeps the offset explicit
+    return orjson.dumps(doc, option=orjson.OPT_NAIVE_UTC | orjson.OPT_APPEND_NEWLINE)
+
+
+def decode_line(line: bytes) -> Dict[str, Any]:
+    doc = orjson.loads(line)
+    for field in DATETIME_FIELDS:
+        if isinstance(doc.get(field), str):
+            doc[field] = datetime.fromisoformat(doc[field])
+    for msg in doc.get("messages") or []:
+        if isinstance(msg.get("timestamp"), str):
+            msg["timestamp"] = datetime.fromisoformat(msg["timestamp"])
+    return doc
+
+
+def zstd_chunks(lines: Iterable[bytes], level: int = ZSTD_LEVEL) -> Iterator[bytes]:
+    """Compress an iterable of lines into a single zstd frame, chunk by chunk."""
+    compressor = zstandard.ZstdCompressor(level=level).compressobj()
+    for line in lines:
+        chunk = compressor.compress(line)
+        if chunk:
+            yield chunk
+    yield compressor.flush()
+
+
+async def zstd_chunks_async(lines: AsyncIterator[bytes], level: int = ZSTD_LEVEL) -> AsyncIterator[bytes]:
+    compressor = zstandard.ZstdCompressor(level=level).compressobj()
+    async for line in lines:
+        chunk = compressor.compress(line)
+        if chunk:
+            yield chunk
+    yield compressor.flush()
+
+
+def is_zstd_path(path: str) -> bool:
+    return path.endswith(".zst") or path.endswith(".zstd")
+
+
+# ---------------- Export ----------------
+def iter_export_lines(collection, since: Optional[datetime], until: datetime,
+                      include_messages: bool = True, batch_size: int = BATCH_SIZE) -> Iterator[bytes]:
+    cursor = collection.find(
+        build_export_query(since, until),
+        build_projection(include_messages),
+        sort=EXPORT_SORT,
+        batch_size=batch_size,
+    )
+    try:
+        for doc in cursor:
+            yield encode_line(doc)
+    finally:
+        cursor.close()
+
+
+async def aiter_export_lines(collection, since: Optional[datetime], until: datetime,
+                             include_messages: bool = True, batch_size: int = BATCH_SIZE) -> AsyncIterator[bytes]:
+    """Async counterpart of iter_export_lines for a Motor collection (used by the admin endpoint)."""
+    cursor = collection.find(
+        build_export_query(since, until),
+        build_projection(include_messages),
+        sort=EXPORT_SORT,
+        batch_size=batch_size,
+    )
+    try:
+        async for doc in cursor:
+            yield encode_line(doc)
+    finally:
+        await cursor.close()
+
+
+def export_sessions(collection, out, since: Optional[datetime] = None, compress: bool = False,
+                    include_messages: bool = True, batch_size: int = BATCH_SIZE) -> Dict[str, Any]:
+    """
+    Write sessions updated after `since` to the binary stream `out`.
+    Returns {"count": n, "watermark": iso} where watermark is the value to pass as `since` next time.
+    """
+    until = export_upper_bound()
+    count = 0
+
+    def counted():
+        nonlocal count
+        for line in iter_export_lines(collection, since, until, include_messages, batch_size):
+            count += 1
+            yield line
+
+    chunks = zstd_chunks(counted()) if compress else counted()
+    for chunk in chunks:
+        out.write(chunk)
+    return {"count": count, "watermark": until.isoformat()}
+
+
+# ---------------- Import ----------------
+def iter_import_docs(stream, compressed: bool = False) -> Iterator[Dict[str, Any]]:
+    if compressed:
+        stream = io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(stream))
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield decode_line(line)
+
+
+def import_sessions(collection, stream, compressed: bool = False, batch_size: int = BATCH_SIZE) -> Dict[str, int]:
+    """
+    Upsert NDJSON session documents keyed by session_id, in bulk batches.
+    Documents without a session_id are skipped.
+    """
+    ops = []
+    stats = {"upserted": 0, "modified": 0, "skipped": 0}
+
+    def flush():
+        if not ops:
+            return
+        result = collection.bulk_write(ops, ordered=False)
+        stats["upserted"] += result.upserted_count
+        stats["modified"] += result.modified_count
+        ops.clear()
+
+    for doc in iter_import_docs(stream, compressed):
+        session_id = doc.get("session_id")
+        if not session_id:
+            stats["skipped"] += 1
+            continue
+        ops.append(UpdateOne({"session_id": session_id}, {"$set": doc}, upsert=True))
+        if len(ops) >= batch_size:
+            flush()
+    flush()
+    return stats
+
+
+# ---------------- CLI ----------------
+def _sync_sessions_collection():
+    client = MongoClient(MONGODB_URI)
+    return client, client[DATABASE_NAME]["sessions"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export/import the sessions collection as NDJSON")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    exp = sub.add_parser("export", help="Stream sessions to NDJSON (zstd if --out ends with .zst)")
+    exp.add_argument("--out", default="-", help="Output path, '-' for stdout")
+    exp.add_argument("--since", help="Export only sessions with updated_at after this ISO watermark")
+    exp.add_argument("--zstd", action="store_true", help="Force zstd compression")
+    exp.add_argument("--no-messages", action="store_true", help="Leave out message histories")
+    exp.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    imp = sub.add_parser("import", help="Upsert sessions from NDJSON (zstd if --in ends with .zst)")
+    imp.add_argument("--in", dest="inp", default="-", help="Input path, '-' for stdin")
+    imp.add_argument("--zstd", action="store_true", help="Force zstd decompression")
+    imp.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    client, collection = _sync_sessions_collection()
+    try:
+        if args.command == "export":
+            compress = args.zstd or is_zstd_path(args.out)
+            out = sys.stdout.buffer if args.out == "-" else open(args.out, "wb")
+            try:
+                result = export_sessions(collection, out, since=parse_watermark(args.since), compress=compress,
+                                         include_messages=not args.no_messages, batch_size=args.batch_size)
+            finally:
+                if out is not sys.stdout.buffer:
+                    out.close()
+            logger.info("Exported %d sessions; next watermark: %s", result["count"], result["watermark"])
+        else:
+            compressed = args.zstd or is_zstd_path(args.inp)
+            stream = sys.stdin.buffer if args.inp == "-" else open(args.inp, "rb")
+            try:
+                stats = import_sessions(collection, stream, compressed=compressed, batch_size=args.batch_size)
+            finally:
+                if stream is not sys.stdin.buffer:
+                    stream.close()
+            logger.info("Imported sessions: %s", stats)
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()